@@ -0,0 +1,94 @@
+""" This module contains the AuthorCache class, which keeps the state of recently seen
+    authors in memory and writes an author only when it is new or has changed.
+"""
+
+from collections import OrderedDict
+import config
+from app import database
+
+
+class AuthorCache:
+    """
+    A class representing a bounded LRU cache of the author table.
+
+    Authors are loaded lazily from the database on a miss. An unchanged author is not
+    written again, so its last_time_fetched only moves when its values change.
+
+    Attributes:
+        database (Database): The database the authors are read from and written to.
+        capacity (int): The maximum number of cached authors.
+        authors (OrderedDict): The num_games_owned and num_reviews per Steam ID,
+                               least recently used first.
+        hits (int): The number of authors found in the cache.
+        misses (int): The number of authors loaded from the database.
+        inserts (int): The number of inserted authors.
+        updates (int): The number of updated authors.
+
+    Methods:
+        __init__: Initializes an empty cache for the given database.
+        write: Inserts or updates an author unless it is unchanged.
+        stats: Formats the hit, miss and write counters.
+    """
+
+    def __init__(self, db: database.Database,
+                 capacity: int = config.AUTHOR_CACHE_SIZE) -> None:
+        """
+        Initializes an empty cache for the given database.
+
+        Args:
+            db (Database): The database the authors are read from and written to.
+            capacity (int): The maximum number of cached authors.
+        """
+        self.database: database.Database = db
+        self.capacity: int = max(1, int(capacity))
+        self.authors: OrderedDict = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.inserts: int = 0
+        self.updates: int = 0
+
+    def write(self, author: dict) -> None:
+        """
+        Inserts the author if it is new, updates it if num_games_owned or num_reviews
+        changed and skips the write otherwise.
+
+        Args:
+            author (dict): A dictionary containing the author data.
+
+        Returns:
+            None
+        """
+        steamid = int(author.get("steamid"))
+        state = (author.get("num_games_owned"), author.get("num_reviews"))
+
+        if steamid in self.authors:
+            self.hits += 1
+            cached = self.authors[steamid]
+            self.authors.move_to_end(steamid)
+        else:
+            self.misses += 1
+            cached = self.database.get_author_state(steamid)
+
+        if cached is None:
+            self.database.insert_author(author)
+            self.inserts += 1
+        elif cached != state:
+            self.database.update_author(author)
+            self.updates += 1
+
+        self.authors[steamid] = state
+        if len(self.authors) > self.capacity:
+            self.authors.popitem(last=False)
+
+    def stats(self) -> str:
+        """
+        Formats the hit, miss and write counters.
+
+        Returns:
+            str: The counters of the cache.
+        """
+        lookups = self.hits + self.misses
+        hit_rate = 100.0 * self.hits / lookups if lookups else 0.0
+        skipped = lookups - self.inserts - self.updates
+        return (f"author cache: {self.hits} hits, {self.misses} misses ({hit_rate:.1f}% hits), "
+                f"{self.inserts} inserts, {self.updates} updates, {skipped} skipped writes")
@@ -0,0 +1,91 @@
+""" This module contains the CrawlLog class, which buffers one journal row per requested
+    page and writes them to the crawl_page table in batches.
+"""
+
+import time
+import config
+from app import database
+
+
+class CrawlLog:
+    """
+    A class representing the crawl journal.
+
+    Attributes:
+        database (Database): The database the journal is written to.
+        batch_size (int): The number of rows buffered before they are written.
+        rows (list): The buffered rows.
+
+    Methods:
+        __init__: Initializes an empty buffer for the given database.
+        log_page: Buffers the journal row of one page.
+        flush: Writes the buffered rows to the database.
+        rollup: Rolls up the rows older than the retention period.
+    """
+
+    def __init__(self, db: database.Database,
+                 batch_size: int = config.CRAWL_LOG_BATCH_SIZE) -> None:
+        """
+        Initializes an empty buffer for the given database.
+
+        Args:
+            db (Database): The database the journal is written to.
+            batch_size (int): The number of rows buffered before they are written.
+        """
+        self.database: database.Database = db
+        self.batch_size: int = max(1, int(batch_size))
+        self.rows: list = []
+
+    def log_page(self, page: dict) -> None:
+        """
+        Buffers the journal row of one page and writes the buffer once it is full.
+        The rows are committed with the next commit of the database.
+
+        Args:
+            page (dict): A dictionary containing the page data.
+
+        Returns:
+            None
+        """
+        self.rows.append((page.get("app_id"),
+                          page.get("cursor"),
+                          page.get("params"),
+                          page.get("http_status"),
+                          page.get("latency_ms"),
+                          page.get("bytes"),
+                          page.get("reviews_returned"),
+                          page.get("inserted"),
+                          page.get("updated"),
+                          page.get("fetched_at", int(time.time()))
+                          ))
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes the buffered rows to the database.
+
+        Returns:
+            None
+        """
+        if self.rows:
+            self.database.insert_crawl_pages(self.rows)
+            self.rows = []
+
+    def rollup(self, retention_days: int = config.CRAWL_LOG_RETENTION_DAYS) -> int:
+        """
+        Rolls up the rows older than the retention period into daily rows per app.
+
+        Args:
+            retention_days (int): The number of days page rows are kept.
+
+        Returns:
+            int: The number of rolled up rows.
+        """
+        self.flush()
+        before = int(time.time()) - retention_days * 86400
+        # only whole days are rolled up, so a day is never split between both tables
+        before -= before % 86400
+        rolled_up = self.database.rollup_crawl_pages(before)
+        self.database.commit()
+        return rolled_up
@@ -0,0 +1,173 @@
+""" This module contains the CrawlPlan class, which estimates the size of a crawl from the
+    query_summary totals reported by Steam and tracks its progress and ETA.
+"""
+
+import math
+
+
+class CrawlPlan:
+    """
+    A class representing the plan and progress of a crawl over several apps.
+
+    Attributes:
+        num_per_page (int): The number of reviews requested per page.
+        totals (dict): The total number of reviews per app ID, None if unknown.
+        app_id (int): The ID of the app currently crawled.
+        app_reviews (int): The number of distinct reviews fetched for the current app.
+        app_pages (int): The number of pages fetched for the current app.
+        done_reviews (int): The number of distinct reviews fetched for the finished apps.
+        pages (int): The number of pages fetched in the crawl.
+        seconds (float): The time spent on the fetched pages.
+
+    Methods:
+        __init__: Initializes the plan with the totals already known for the apps.
+        start_app: Starts the progress of an app.
+        set_total: Sets the total number of reviews of the current app.
+        add_page: Adds a fetched page to the progress.
+        is_app_complete: Checks if all reviews of the current app were fetched.
+        estimate_pages: Estimates the number of pages of an app.
+        progress: Formats the progress and ETA of the current app and of the crawl.
+    """
+
+    def __init__(self, totals: dict, num_per_page: int) -> None:
+        """
+        Initializes the plan with the totals already known for the apps.
+
+        Args:
+            totals (dict): The total number of reviews per app ID, None if unknown.
+            num_per_page (int): The number of reviews requested per page.
+        """
+        self.num_per_page: int = max(1, int(num_per_page or 20))
+        self.totals: dict = dict(totals)
+        self.app_id: int = None
+        self.app_reviews: int = 0
+        self.app_pages: int = 0
+        self.done_reviews: int = 0
+        self.pages: int = 0
+        self.seconds: float = 0.0
+
+    def start_app(self, app_id: int) -> None:
+        """
+        Starts the progress of an app and finishes the one before.
+
+        Args:
+            app_id (int): The ID of the app.
+
+        Returns:
+            None
+        """
+        if self.app_id is not None:
+            self.done_reviews += self.app_reviews
+            self.totals[self.app_id] = self.app_reviews
+        self.app_id = app_id
+        self.app_reviews = 0
+        self.app_pages = 0
+
+    def set_total(self, total_reviews: int) -> None:
+        """
+        Sets the total number of reviews of the current app.
+
+        Args:
+            total_reviews (int): The total number of reviews reported by Steam.
+
+        Returns:
+            None
+        """
+        self.totals[self.app_id] = total_reviews
+
+    def add_page(self, reviews: int, seconds: float) -> None:
+        """
+        Adds a fetched page to the progress.
+
+        Args:
+            reviews (int): The number of reviews of the page not fetched before for the app.
+            seconds (float): The time spent on the page.
+
+        Returns:
+            None
+        """
+        self.app_reviews += reviews
+        self.app_pages += 1
+        self.pages += 1
+        self.seconds += seconds
+
+    def is_app_complete(self) -> bool:
+        """
+        Checks if all reviews of the current app were fetched.
+
+        Returns:
+            bool: True if the total of the app is known and reached, False otherwise.
+        """
+        total = self.totals.get(self.app_id)
+        return total is not None and self.app_reviews >= total
+
+    def estimate_pages(self, app_id: int) -> int:
+        """
+        Estimates the number of pages of an app.
+
+        Args:
+            app_id (int): The ID of the app.
+
+        Returns:
+            int: The estimated number of pages, None if the total is unknown.
+        """
+        total = self.totals.get(app_id)
+        if total is None:
+            return None
+        return max(1, math.ceil(total / self.num_per_page))
+
+    def progress(self) -> str:
+        """
+        Formats the progress and ETA of the current app and of the crawl. While the total
+        of the current or a remaining app is unknown, the total of the crawl is shown as a
+        lower bound and its percentage and ETA as unknown.
+
+        Returns:
+            str: The progress of the current app and of the crawl.
+        """
+        seconds_per_page = self.seconds / self.pages if self.pages else 0.0
+        app_pages = self.estimate_pages(self.app_id)
+        app_total = self.totals.get(self.app_id)
+        if app_pages is None:
+            app_progress = f"{self.app_reviews} reviews"
+            app_eta = "?"
+        else:
+            app_remaining = max(0, app_pages - self.app_pages)
+            app_progress = (f"{min(self.app_reviews, app_total)}/{app_total} reviews "
+                            f"{self.app_pages}/{max(app_pages, self.app_pages)} pages")
+            app_eta = _format_seconds(app_remaining * seconds_per_page)
+
+        remaining_pages = max(0, (app_pages or 0) - self.app_pages)
+        total_reviews = self.done_reviews + max(self.app_reviews, app_total or 0)
+        unknown = app_total is None
+        started = False
+        for app_id, total in self.totals.items():
+            if app_id == self.app_id:
+                started = True
+            elif started:
+                unknown = unknown or total is None
+                remaining_pages += self.estimate_pages(app_id) or 0
+                total_reviews += total or 0
+        fetched_reviews = self.done_reviews + self.app_reviews
+        if unknown:
+            return (f"app: {app_progress} eta {app_eta} | "
+                    f"total: {fetched_reviews}/{total_reviews}+? reviews (?%) eta ?")
+        percent = 100.0 * fetched_reviews / total_reviews if total_reviews else 0.0
+        eta = _format_seconds(remaining_pages * seconds_per_page)
+        return (f"app: {app_progress} eta {app_eta} | "
+                f"total: {fetched_reviews}/{total_reviews} reviews ({percent:.1f}%) eta {eta}")
+
+
+def _format_seconds(seconds: float) -> str:
+    """
+    Formats a duration as hours, minutes and seconds.
+
+    Args:
+        seconds (float): The duration in seconds.
+
+    Returns:
+        str: The duration as H:MM:SS.
+    """
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
@@ -2,10 +2,31 @@
     the SQLite database and inserting data into it.
 """
 
+import re
 import sqlite3
 import config
 # from datetime import datetime
 
+
+def shard_of(app_id: int, shards: int) -> int:
+    """
+    Get the review shard of an app. Steam app IDs are mostly multiples of 10, so the ID
+    is mixed with the splitmix64 finalizer before the modulo.
+
+    Args:
+        app_id (int): The ID of the app.
+        shards (int): The number of review shards.
+
+    Returns:
+        int: The number of the shard.
+    """
+    mask = (1 << 64) - 1
+    value = int(app_id) & mask
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & mask
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & mask
+    value ^= value >> 31
+    return value % shards
+
 class Database:
     """
     A class representing a database connection.
@@ -13,24 +34,107 @@ class Database:
     Attributes:
         connection (sqlite3.Connection): The connection to the SQLite database.
         cursor (sqlite3.Cursor): The cursor object for executing SQL queries.
+        shards (int): The number of attached review shards, 0 if the review table is not sharded.
 
     Methods:
         __init__: Connects to the SQLite database and initializes the connection and cursor.
+        attach_shards: Attaches the review shards and creates the union view for reads.
+        get_stored_shards: Get the number of review shards the reviews are routed to.
         close: Closes the database connection and cursor.
         insert_app: Inserts a app into the database.
         insert_author: Inserts an author into the database.
         insert_review: Inserts a review into the database.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, shards: int = None) -> None:
         """
         Connects to the SQLite database and returns the database connection and cursor.
+
+        Args:
+            shards (int): The number of review shards to attach, REVIEW_SHARDS if None.
         """
         try:
             self.connection = sqlite3.connect(config.DATABASE_PATH)
             self.cursor = self.connection.cursor()
+            # applies to new databases only, existing ones switch with the next VACUUM
+            self.cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self.cursor.execute(f"PRAGMA journal_mode = {config.JOURNAL_MODE}").fetchone()
         except sqlite3.Error as e:
             print(f"Error {e}: for connecting to {config.DATABASE_PATH}.")
+        self.shards: int = 0
+        shards = config.REVIEW_SHARDS if shards is None else shards
+        stored = self.get_stored_shards()
+        if stored not in (0, shards):
+            # the shard of a review depends on the number of shards, so with another
+            # number existing reviews would not be found and be inserted a second time
+            raise ValueError(f"The reviews are routed to {stored} shards, not {shards}. "
+                             "Run python shard_reviews.py to rebalance them.")
+        if shards > 0:
+            self.attach_shards(shards)
+
+
+    def attach_shards(self, shards: int) -> None:
+        """
+        Attaches the review shard files and creates the review table in each of them.
+        A temporary view named review, which shadows the review table of the main
+        database, serves reads from all shards. Writes are routed by review_table.
+
+        Args:
+            shards (int): The number of review shards.
+
+        Returns:
+            None
+        """
+        with open(config.SCHEMA_PATH, "r", encoding="utf-8") as f:
+            schema = f.read()
+        ddl = re.search(r'CREATE TABLE IF NOT EXISTS "review".*?\);', schema, re.DOTALL)
+        # foreign keys cannot reference tables in another database file
+        ddl = re.sub(r',\s*FOREIGN KEY[^\n]*', "", ddl.group(0))
+        indexes = re.findall(r'CREATE INDEX IF NOT EXISTS "main"\."\w+" ON "review".*?;', schema)
+        try:
+            for shard in range(shards):
+                self.cursor.execute(f"ATTACH DATABASE ? AS shard_{shard}",
+                                    (config.REVIEW_SHARD_PATH.format(shard),))
+                self.cursor.execute(f"PRAGMA shard_{shard}.auto_vacuum = INCREMENTAL")
+                self.cursor.execute(
+                    f"PRAGMA shard_{shard}.journal_mode = {config.JOURNAL_MODE}").fetchone()
+                self.cursor.execute(ddl.replace('"review"', f'"shard_{shard}"."review"', 1))
+                for index in indexes:
+                    self.cursor.execute(index.replace('"main".', f'"shard_{shard}".', 1))
+            # the move query in move_reviews_to_shards routes with the same hash as review_table
+            self.connection.create_function("shard_of", 2, shard_of, deterministic=True)
+            self.cursor.execute("CREATE TEMP VIEW review AS " + " UNION ALL ".join(
+                f"SELECT * FROM shard_{shard}.review" for shard in range(shards)))
+            if self.get_stored_shards() == 0:
+                self.cursor.execute(f"PRAGMA main.user_version = {int(shards)}")
+            self.connection.commit()
+            self.shards = shards
+        except sqlite3.Error as e:
+            print(f"Error {e}: for attaching {shards} review shards.")
+
+    def get_stored_shards(self) -> int:
+        """
+        Get the number of review shards the reviews are routed to, stored in the
+        user_version of the main database when the shards are first attached.
+
+        Returns:
+            int: The number of review shards, 0 if the review table is not sharded.
+        """
+        return self.cursor.execute("PRAGMA main.user_version").fetchone()[0]
+
+    def review_table(self, app_id: int) -> str:
+        """
+        Get the review table the reviews of an app are written to.
+
+        Args:
+            app_id (int): The ID of the app.
+
+        Returns:
+            str: The qualified name of the review table.
+        """
+        if self.shards == 0:
+            return "main.review"
+        return f"shard_{shard_of(app_id, self.shards)}.review"
 
 
     def close(self) -> None:
@@ -58,7 +162,10 @@ class Database:
             None
         """
         try:
-            self.cursor.execute("INSERT INTO app VALUES (?, ?, ?, ?)", data)
+            self.cursor.execute("""
+                    INSERT INTO app (id, name, shop_url, last_time_fetched)
+                    VALUES (?, ?, ?, ?)
+                    """, data)
         except sqlite3.Error as e:
             print(f"Error {e}: for {data}")
         # self.connection.commit()
@@ -77,13 +184,13 @@ class Database:
         self.cursor.execute("SELECT * FROM app WHERE id = ?", (app_id,))
         return self.cursor.fetchone() is not None
 
-    def update_app_last_time_fetched(self, app_id: int, last_time_fetched: str) -> None:
+    def update_app_last_time_fetched(self, app_id: int, last_time_fetched: int) -> None:
         """
         Update the last time fetched for a specific app in the database.
 
         Args:
             app_id (int): The ID of the app to update.
-            last_time_fetched (str): The last time the app was fetched.
+            last_time_fetched (int): The last time the app was fetched as unix epoch.
 
         Returns:
             None
@@ -95,6 +202,50 @@ class Database:
             print(f"Error {e}: for {data}")
         # self.connection.commit()
 
+    def update_app_review_totals(self, app_id: int, query_summary: dict) -> None:
+        """
+        Update the review totals of a specific app from the query summary of its first page.
+
+        Args:
+            app_id (int): The ID of the app to update.
+            query_summary (dict): The query summary reported by Steam.
+
+        Returns:
+            None
+        """
+        data = (query_summary.get("total_reviews"),
+                query_summary.get("total_positive"),
+                query_summary.get("total_negative"),
+                query_summary.get("review_score"),
+                app_id
+                )
+        try:
+            self.cursor.execute("""
+                    UPDATE app
+                    SET total_reviews = ?,
+                        total_positive = ?,
+                        total_negative = ?,
+                        review_score = ?
+                    WHERE id = ?
+                    """, data)
+        except sqlite3.Error as e:
+            print(f"Error {e}: for {data}")
+        # self.connection.commit()
+
+    def get_app_review_totals(self) -> dict:
+        """
+        Get the total number of reviews of all apps from the database.
+
+        Returns:
+            dict: The total number of reviews per app ID, None if unknown.
+        """
+        try:
+            self.cursor.execute("SELECT id, total_reviews FROM app")
+        except sqlite3.Error as e:
+            print(f"Error {e}: for getting the review totals")
+            return {}
+        return dict(self.cursor.fetchall())
+
     def insert_author(self, author: dict) -> None:
         """
         Inserts author data into the database.
@@ -129,6 +280,21 @@ class Database:
         self.cursor.execute("SELECT * FROM author WHERE steamid = ?", (steamid,))
         return self.cursor.fetchone() is not None
 
+    def get_author_state(self, steamid: int) -> tuple:
+        """
+        Get the number of games owned and reviews of an author for a given Steam ID.
+
+        Args:
+            steamid (int): The Steam ID of the author.
+
+        Returns:
+            tuple: A tuple containing num_games_owned and num_reviews,
+                   None if the author does not exist.
+        """
+        self.cursor.execute("SELECT num_games_owned, num_reviews FROM author WHERE steamid = ?",
+                            (steamid,))
+        return self.cursor.fetchone()
+
     def update_author(self, author: dict) -> None:
         """
         Updates an author in the database.
@@ -198,8 +364,8 @@ class Database:
         )
 
         try:
-            self.cursor.execute("""
-                        INSERT INTO review
+            self.cursor.execute(f"""
+                        INSERT INTO {self.review_table(review.get("app_id"))}
                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                         """, data)
         except sqlite3.Error as e:
@@ -244,8 +410,8 @@ class Database:
         data = data + (author_steamid, app_id)
 
         try:
-            self.cursor.execute("""
-                    UPDATE review
+            self.cursor.execute(f"""
+                    UPDATE {self.review_table(app_id)}
                     SET comment_count = ?,
                         hidden_in_steam_china = ?,
                         language = ?,
@@ -287,7 +453,8 @@ class Database:
         Returns:
             bool: True if a review exists, False otherwise.
         """
-        self.cursor.execute("""SELECT * FROM review WHERE author_steamid = ? and app_id = ?""",
+        self.cursor.execute(f"""SELECT * FROM {self.review_table(app_id)}
+                            WHERE author_steamid = ? and app_id = ?""",
                             (author_steamid, app_id))
         return self.cursor.fetchone() is not None
 
@@ -327,6 +494,276 @@ class Database:
         self.cursor.execute('SELECT id FROM app WHERE name LIKE "%?%"', (app_name,))
         return [row[0] for row in self.cursor.fetchall()]
 
+    def insert_crawl_pages(self, rows: list) -> None:
+        """
+        Inserts a batch of page rows into the crawl journal.
+
+        Args:
+            rows (list): A list of tuples containing app_id, cursor, params, http_status,
+                         latency_ms, bytes, reviews_returned, inserted, updated and fetched_at.
+
+        Returns:
+            None
+        """
+        try:
+            self.cursor.executemany("""
+                        INSERT INTO crawl_page
+                        VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        """, rows)
+        except sqlite3.Error as e:
+            print(f"Error {e}: for {len(rows)} crawl pages")
+        # self.connection.commit()
+
+    def rollup_crawl_pages(self, before: int) -> int:
+        """
+        Aggregates the crawl journal rows fetched before a given time into the daily
+        rollup table and deletes them.
+
+        Args:
+            before (int): The unix epoch before which rows are rolled up.
+
+        Returns:
+            int: The number of rolled up rows.
+        """
+        try:
+            self.cursor.execute("""
+                    INSERT INTO crawl_rollup
+                    SELECT app_id,
+                           fetched_at - fetched_at % 86400 AS day,
+                           COUNT(*),
+                           SUM(http_status IS NULL OR http_status != 200),
+                           SUM(latency_ms),
+                           MAX(latency_ms),
+                           SUM(bytes),
+                           SUM(reviews_returned),
+                           SUM(inserted),
+                           SUM(updated),
+                           MIN(fetched_at),
+                           MAX(fetched_at)
+                    FROM crawl_page
+                    WHERE fetched_at < ?
+                    GROUP BY app_id, day
+                    ON CONFLICT(app_id, day) DO UPDATE
+                    SET pages = pages + excluded.pages,
+                        errors = errors + excluded.errors,
+                        latency_ms_total = latency_ms_total + excluded.latency_ms_total,
+                        latency_ms_max = MAX(latency_ms_max, excluded.latency_ms_max),
+                        bytes = bytes + excluded.bytes,
+                        reviews_returned = reviews_returned + excluded.reviews_returned,
+                        inserted = inserted + excluded.inserted,
+                        updated = updated + excluded.updated,
+                        first_fetched_at = MIN(first_fetched_at, excluded.first_fetched_at),
+                        last_fetched_at = MAX(last_fetched_at, excluded.last_fetched_at)
+                    """, (before,))
+            self.cursor.execute("DELETE FROM crawl_page WHERE fetched_at < ?", (before,))
+            return self.cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"Error {e}: for rolling up crawl pages before {before}")
+            self.connection.rollback()
+            return 0
+
+    def get_crawl_throughput(self, bucket_seconds: int) -> list:
+        """
+        Get the crawl throughput of the journal grouped into time buckets. Rolled up days
+        are shown per day if the buckets are shorter than a day, since their pages are
+        only known per day.
+
+        Args:
+            bucket_seconds (int): The length of a time bucket in seconds.
+
+        Returns:
+            list: A list of tuples containing the bucket start, bucket length in seconds,
+                  pages, reviews returned and pages per second of the bucket length.
+        """
+        rollup_seconds = max(bucket_seconds, 86400)
+        self.cursor.execute("""
+                SELECT bucket,
+                       seconds,
+                       SUM(pages),
+                       SUM(reviews_returned),
+                       SUM(pages) * 1.0 / seconds
+                FROM (
+                    SELECT fetched_at - fetched_at % ? AS bucket, ? AS seconds, 1 AS pages,
+                           reviews_returned
+                    FROM crawl_page
+                    UNION ALL
+                    SELECT day - day % ?, ?, pages, reviews_returned
+                    FROM crawl_rollup
+                )
+                GROUP BY bucket, seconds
+                ORDER BY bucket, seconds
+                """, (bucket_seconds, bucket_seconds, rollup_seconds, rollup_seconds))
+        return self.cursor.fetchall()
+
+    def get_slowest_apps(self, limit: int) -> list:
+        """
+        Get the apps with the highest average page latency, journal and rollup combined.
+
+        Args:
+            limit (int): The maximum number of apps.
+
+        Returns:
+            list: A list of tuples containing the app ID, pages, average latency in ms,
+                  maximum latency in ms and errors.
+        """
+        self.cursor.execute("""
+                SELECT app_id,
+                       SUM(pages),
+                       SUM(latency_ms_total) / SUM(pages),
+                       MAX(latency_ms_max),
+                       SUM(errors)
+                FROM (
+                    SELECT app_id, COUNT(*) AS pages, SUM(latency_ms) AS latency_ms_total,
+                           MAX(latency_ms) AS latency_ms_max,
+                           SUM(http_status IS NULL OR http_status != 200) AS errors
+                    FROM crawl_page
+                    GROUP BY app_id
+                    UNION ALL
+                    SELECT app_id, pages, latency_ms_total, latency_ms_max, errors
+                    FROM crawl_rollup
+                )
+                GROUP BY app_id
+                ORDER BY 3 DESC
+                LIMIT ?
+                """, (limit,))
+        return self.cursor.fetchall()
+
+    def get_review_numbers(self, since: int, until: int, batch_size: int):
+        """
+        Get the numeric fields of the reviews fetched after since and before until,
+        ordered by app ID. NULL values are returned as 0.
+
+        Args:
+            since (int): The last_time_fetched after which reviews are returned,
+                         None for all reviews including those never fetched.
+            until (int): The last_time_fetched before which reviews are returned,
+                         ignored if since is None.
+            batch_size (int): The number of rows per batch.
+
+        Returns:
+            generator: Lists of tuples containing app_id, author_steamid, voted_up, votes_up,
+                       weighted_vote_score, the four playtime fields, timestamp_created
+                       and timestamp_updated.
+        """
+        select = """
+                SELECT app_id,
+                       author_steamid,
+                       CAST(COALESCE(voted_up, 0) AS INTEGER),
+                       COALESCE(votes_up, 0),
+                       CAST(COALESCE(weighted_vote_score, 0) AS REAL),
+                       COALESCE(author_playtime_at_review, 0),
+                       COALESCE(author_playtime_forever, 0),
+                       COALESCE(author_playtime_last_two_weeks, 0),
+                       COALESCE(author_last_played, 0),
+                       COALESCE(timestamp_created, 0),
+                       COALESCE(timestamp_updated, 0)
+                FROM review
+                """
+        cursor = self.connection.cursor()
+        if since is None:
+            cursor.execute(select + "ORDER BY app_id, author_steamid")
+        else:
+            # a plain range, so only the changed part of review_last_time_fetched is read
+            cursor.execute(select + """
+                WHERE last_time_fetched > ? AND last_time_fetched < ?
+                ORDER BY app_id, author_steamid
+                """, (since, until))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+        cursor.close()
+
+    def move_reviews_to_shards(self, batch_size: int = 10000) -> int:
+        """
+        Moves the reviews of the review table in the main database into the shards,
+        one committed batch at a time. A review already in a shard is only replaced
+        if the one in the main database was fetched later.
+
+        Args:
+            batch_size (int): The number of reviews moved per batch.
+
+        Returns:
+            int: The number of moved reviews.
+        """
+        if self.shards == 0:
+            return 0
+        moved = 0
+        try:
+            while True:
+                rowids = self.cursor.execute(
+                    "SELECT rowid FROM main.review ORDER BY rowid LIMIT ?",
+                    (batch_size,)).fetchall()
+                if not rowids:
+                    break
+                last_rowid = rowids[-1][0]
+                for shard in range(self.shards):
+                    self.cursor.execute(f"""
+                            INSERT OR REPLACE INTO shard_{shard}.review
+                            SELECT * FROM main.review AS m
+                            WHERE m.rowid <= ?
+                            AND shard_of(m.app_id, ?) = ?
+                            AND NOT EXISTS (
+                                SELECT 1 FROM shard_{shard}.review AS s
+                                WHERE s.author_steamid = m.author_steamid
+                                AND s.app_id = m.app_id
+                                AND s.last_time_fetched >= m.last_time_fetched
+                            )
+                            """, (last_rowid, self.shards, shard))
+                self.cursor.execute("DELETE FROM main.review WHERE rowid <= ?", (last_rowid,))
+                moved += self.cursor.rowcount
+                self.connection.commit()
+        except sqlite3.Error as e:
+            print(f"Error {e}: for moving reviews to {self.shards} shards.")
+            self.connection.rollback()
+        return moved
+
+    def move_reviews_from_shards(self, batch_size: int = 10000) -> int:
+        """
+        Moves the reviews of the attached shards back into the review table in the main
+        database, one committed batch at a time, and marks the review table as not sharded.
+        A review already in the main database is only replaced if the one in the shard
+        was fetched later.
+
+        Args:
+            batch_size (int): The number of reviews moved per batch.
+
+        Returns:
+            int: The number of moved reviews.
+        """
+        moved = 0
+        try:
+            for shard in range(self.shards):
+                while True:
+                    rowids = self.cursor.execute(
+                        f"SELECT rowid FROM shard_{shard}.review ORDER BY rowid LIMIT ?",
+                        (batch_size,)).fetchall()
+                    if not rowids:
+                        break
+                    last_rowid = rowids[-1][0]
+                    self.cursor.execute(f"""
+                            INSERT OR REPLACE INTO main.review
+                            SELECT * FROM shard_{shard}.review AS s
+                            WHERE s.rowid <= ?
+                            AND NOT EXISTS (
+                                SELECT 1 FROM main.review AS m
+                                WHERE m.author_steamid = s.author_steamid
+                                AND m.app_id = s.app_id
+                                AND m.last_time_fetched >= s.last_time_fetched
+                            )
+                            """, (last_rowid,))
+                    self.cursor.execute(f"DELETE FROM shard_{shard}.review WHERE rowid <= ?",
+                                        (last_rowid,))
+                    moved += self.cursor.rowcount
+                    self.connection.commit()
+            self.cursor.execute("PRAGMA main.user_version = 0")
+            self.connection.commit()
+        except sqlite3.Error as e:
+            print(f"Error {e}: for moving reviews from {self.shards} shards.")
+            self.connection.rollback()
+        return moved
+
     def get_cursor(self) -> str:
         """
         Get the cursor from the database.
@@ -0,0 +1,204 @@
+""" This module contains the memory-bounded structures used to detect cursor cycles
+    and duplicate pages while crawling the reviews of a single app.
+"""
+
+import hashlib
+import math
+from collections import deque
+import config
+
+
+class CursorWindow:
+    """
+    A class representing a rolling window of the most recently seen cursors.
+
+    Attributes:
+        size (int): The maximum number of cursors kept in the window.
+        cursors (deque): The cursors in the order they were seen.
+        members (set): The cursors in the window, for constant time lookups.
+
+    Methods:
+        __init__: Initializes an empty window of the given size.
+        add: Adds a cursor to the window and reports if it was already in it.
+        clear: Removes all cursors from the window.
+    """
+
+    def __init__(self, size: int = config.DEDUP_CURSOR_WINDOW) -> None:
+        """
+        Initializes an empty window of the given size.
+
+        Args:
+            size (int): The maximum number of cursors kept in the window.
+        """
+        self.size: int = max(1, int(size))
+        self.cursors: deque = deque()
+        self.members: set = set()
+
+    def add(self, cursor: str) -> bool:
+        """
+        Adds a cursor to the window, evicting the oldest one if the window is full.
+
+        Args:
+            cursor (str): The cursor to add.
+
+        Returns:
+            bool: True if the cursor was already in the window, False otherwise.
+        """
+        if cursor in self.members:
+            return True
+        if len(self.cursors) >= self.size:
+            self.members.discard(self.cursors.popleft())
+        self.cursors.append(cursor)
+        self.members.add(cursor)
+        return False
+
+    def clear(self) -> None:
+        """
+        Removes all cursors from the window.
+
+        Returns:
+            None
+        """
+        self.cursors.clear()
+        self.members.clear()
+
+
+class BloomFilter:
+    """
+    A class representing a fixed size Bloom filter for integer IDs.
+
+    The filter may report an ID as seen although it was not (false positive),
+    but never reports a seen ID as unseen. Its memory use is fixed at creation.
+
+    Attributes:
+        num_bits (int): The number of bits in the filter.
+        num_hashes (int): The number of bit positions set for every ID.
+        bits (bytearray): The bit array of the filter.
+
+    Methods:
+        __init__: Sizes the filter for the expected number of IDs and false positive rate.
+        add: Adds an ID to the filter and reports if it was probably already in it.
+        clear: Removes all IDs from the filter.
+    """
+
+    def __init__(self,
+                 capacity: int = config.DEDUP_BLOOM_CAPACITY,
+                 false_positive_rate: float = config.DEDUP_BLOOM_FALSE_POSITIVE_RATE
+                 ) -> None:
+        """
+        Sizes the filter for the expected number of IDs and false positive rate.
+
+        Args:
+            capacity (int): The expected number of IDs.
+            false_positive_rate (float): The accepted false positive rate at full capacity.
+        """
+        capacity = max(1, int(capacity))
+        num_bits = -capacity * math.log(false_positive_rate) / (math.log(2) ** 2)
+        self.num_bits: int = max(8, int(math.ceil(num_bits)))
+        self.num_hashes: int = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits: bytearray = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, value: int) -> list:
+        """
+        Get the bit positions of an ID using double hashing.
+
+        Args:
+            value (int): The ID.
+
+        Returns:
+            list: The bit positions of the ID.
+        """
+        digest = hashlib.blake2b(str(value).encode("ascii"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, value: int) -> bool:
+        """
+        Adds an ID to the filter.
+
+        Args:
+            value (int): The ID to add.
+
+        Returns:
+            bool: True if the ID was probably already in the filter, False otherwise.
+        """
+        seen = True
+        for position in self._positions(value):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                seen = False
+                self.bits[byte] |= 1 << bit
+        return seen
+
+    def clear(self) -> None:
+        """
+        Removes all IDs from the filter.
+
+        Returns:
+            None
+        """
+        self.bits = bytearray(len(self.bits))
+
+
+class CrawlDeduplicator:
+    """
+    A class detecting cursor cycles and duplicate pages during the crawl of one app.
+
+    Attributes:
+        cursor_window (CursorWindow): The window of recently seen cursors.
+        recommendations (BloomFilter): The recommendation IDs seen during the crawl.
+
+    Methods:
+        __init__: Initializes the cursor window and the Bloom filter.
+        is_cursor_seen: Adds a cursor and reports if it closes a cycle.
+        is_page_seen: Adds the recommendation IDs of a page and reports if all were seen
+                      and how many were new.
+        reset: Forgets everything seen, e.g. before crawling the next app.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes the cursor window and the Bloom filter.
+        """
+        self.cursor_window: CursorWindow = CursorWindow()
+        self.recommendations: BloomFilter = BloomFilter()
+
+    def is_cursor_seen(self, cursor: str) -> bool:
+        """
+        Adds a cursor and reports if it was returned recently, i.e. the page chain loops.
+
+        Args:
+            cursor (str): The cursor returned by Steam.
+
+        Returns:
+            bool: True if the cursor was seen recently, False otherwise.
+        """
+        return self.cursor_window.add(cursor)
+
+    def is_page_seen(self, reviews: list) -> tuple:
+        """
+        Adds the recommendation IDs of a page and reports if the whole page was seen before.
+
+        Args:
+            reviews (list): The reviews of the page as returned by Steam.
+
+        Returns:
+            tuple: True if the page is not empty and every review was seen before,
+                   False otherwise, and the number of reviews not seen before.
+        """
+        new = 0
+        for review in reviews:
+            if not self.recommendations.add(review.get("recommendationid")):
+                new += 1
+        return len(reviews) > 0 and new == 0, new
+
+    def reset(self) -> None:
+        """
+        Forgets everything seen, e.g. before crawling the next app.
+
+        Returns:
+            None
+        """
+        self.cursor_window.clear()
+        self.recommendations.clear()
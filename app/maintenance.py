@@ -0,0 +1,180 @@
+""" This module contains the Maintenance class, which backs up and maintains the database
+    while a crawl keeps writing to it.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import config
+from app import database
+
+
+class Maintenance:
+    """
+    A class representing the maintenance of the database during a crawl.
+
+    The scheduled tasks (PRAGMA optimize, incremental vacuum and WAL checkpoints) run on
+    the connection of the writer between its commits, so they never wait for its lock.
+    Online backups run in a background thread on their own connections. They hold a read
+    transaction on the source, which in WAL mode is a consistent snapshot the writer does
+    not block, and copy it in small page steps that pause while the writer has pending writes.
+
+    Attributes:
+        database (Database): The database of the writer.
+        writer_depth (int): The number of writes the writer has pending until its next commit.
+        last_run (dict): The time each scheduled task last ran.
+        backups (int): The number of completed backups.
+        stop_event (threading.Event): Set to stop the backup thread.
+        thread (threading.Thread): The backup thread, None if backups are disabled.
+
+    Methods:
+        __init__: Initializes the schedule for the given database.
+        start: Starts the backup thread if backups are enabled.
+        stop: Stops the backup thread and runs PRAGMA optimize.
+        run_due: Runs the scheduled tasks that are due, called by the writer after a commit.
+        backup: Backs up the database and its review shards.
+    """
+
+    def __init__(self, db: database.Database) -> None:
+        """
+        Initializes the schedule for the given database.
+
+        Args:
+            db (Database): The database of the writer.
+        """
+        self.database: database.Database = db
+        self.writer_depth: int = 0
+        now = time.monotonic()
+        self.last_run: dict = {"optimize": now, "vacuum": now, "checkpoint": now}
+        self.backups: int = 0
+        self.stop_event: threading.Event = threading.Event()
+        self.thread: threading.Thread = None
+
+    def start(self) -> None:
+        """
+        Starts the backup thread if BACKUP_INTERVAL is greater than 0.
+
+        Returns:
+            None
+        """
+        if config.BACKUP_INTERVAL > 0 and self.thread is None:
+            self.thread = threading.Thread(target=self._backup_loop, daemon=True)
+            self.thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the backup thread and runs PRAGMA optimize on the connection of the writer.
+
+        Returns:
+            None
+        """
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self._execute("PRAGMA optimize")
+
+    def run_due(self) -> None:
+        """
+        Runs the scheduled tasks that are due. Called by the writer right after a commit.
+
+        Returns:
+            None
+        """
+        now = time.monotonic()
+        if now - self.last_run["vacuum"] >= config.MAINTENANCE_VACUUM_INTERVAL:
+            schemas = ["main"] + [f"shard_{shard}" for shard in range(self.database.shards)]
+            for schema in schemas:
+                self._execute(f"PRAGMA {schema}.incremental_vacuum"
+                              f"({config.MAINTENANCE_VACUUM_PAGES})")
+            self.last_run["vacuum"] = now
+        if now - self.last_run["checkpoint"] >= config.MAINTENANCE_CHECKPOINT_INTERVAL:
+            # a passive checkpoint never waits for readers, such as a running backup
+            self._execute("PRAGMA wal_checkpoint(PASSIVE)")
+            self.last_run["checkpoint"] = now
+        if now - self.last_run["optimize"] >= config.MAINTENANCE_OPTIMIZE_INTERVAL:
+            self._execute("PRAGMA optimize")
+            self.last_run["optimize"] = now
+
+    def _execute(self, statement: str) -> None:
+        """
+        Executes a maintenance statement on the connection of the writer and commits it.
+
+        Args:
+            statement (str): The statement to execute.
+
+        Returns:
+            None
+        """
+        try:
+            # executescript steps the statement to the end, incremental_vacuum frees
+            # only one page per step
+            self.database.cursor.executescript(f"{statement};")
+            self.database.commit()
+        except sqlite3.Error as e:
+            print(f"Error {e}: for {statement}")
+
+    def _backup_loop(self) -> None:
+        """
+        Backs up the database every BACKUP_INTERVAL seconds until the thread is stopped.
+
+        Returns:
+            None
+        """
+        while not self.stop_event.wait(config.BACKUP_INTERVAL):
+            self.backup()
+
+    def _throttle(self, status: int, remaining: int, total: int) -> None:
+        """
+        Pauses the backup between two page steps while the writer has more than
+        BACKUP_MAX_WRITER_DEPTH writes pending, at most BACKUP_MAX_WAIT seconds.
+
+        Args:
+            status (int): The status of the last backup step.
+            remaining (int): The number of pages still to be copied.
+            total (int): The number of pages of the source database.
+
+        Returns:
+            None
+        """
+        time.sleep(config.BACKUP_STEP_SLEEP)
+        waited = 0.0
+        while (self.writer_depth > config.BACKUP_MAX_WRITER_DEPTH
+               and waited < config.BACKUP_MAX_WAIT):
+            time.sleep(config.BACKUP_STEP_SLEEP)
+            waited += config.BACKUP_STEP_SLEEP
+        if self.stop_event.is_set() and remaining > 0:
+            raise InterruptedError("backup stopped")
+
+    def backup(self) -> bool:
+        """
+        Backs up the database and its review shards one file at a time into BACKUP_PATH.
+        A backup file is replaced only once it is complete.
+
+        Returns:
+            bool: True if all files were backed up, False otherwise.
+        """
+        paths = [config.DATABASE_PATH]
+        paths += [config.REVIEW_SHARD_PATH.format(shard) for shard in range(config.REVIEW_SHARDS)]
+        os.makedirs(config.BACKUP_PATH, exist_ok=True)
+        for path in paths:
+            backup_path = os.path.join(config.BACKUP_PATH, os.path.basename(path))
+            source = sqlite3.connect(path)
+            target = sqlite3.connect(backup_path + ".tmp")
+            try:
+                # the open read transaction pins the snapshot the backup copies
+                source.execute("BEGIN")
+                source.execute("SELECT COUNT(*) FROM sqlite_master").fetchall()
+                source.backup(target, pages=config.BACKUP_PAGES_PER_STEP, progress=self._throttle)
+            except (sqlite3.Error, InterruptedError) as e:
+                print(f"Error {e}: for backing up {path}.")
+                target.close()
+                source.close()
+                os.remove(backup_path + ".tmp")
+                return False
+            target.close()
+            source.close()
+            os.replace(backup_path + ".tmp", backup_path)
+        self.backups += 1
+        return True
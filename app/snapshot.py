@@ -0,0 +1,224 @@
+""" This module contains the ReviewSnapshot class, which keeps the numeric fields of the
+    review table as memory-mapped NumPy arrays, one file per column.
+"""
+
+import json
+import os
+import time
+import numpy as np
+import config
+from app import database
+
+
+class ReviewSnapshot:
+    """
+    A class representing a columnar snapshot of the numeric fields of the review table.
+
+    Every column is a flat binary file in the snapshot directory. Rows are appended in
+    segments sorted by app ID, so the rows of an app are one contiguous range per
+    segment. Rows superseded by a later refresh are marked in the live column.
+
+    Attributes:
+        path (str): The directory of the snapshot.
+        rows (int): The number of rows in the snapshot, live or not.
+        watermark (int): The last_time_fetched up to which all reviews are in the snapshot.
+        ranges (dict): The [start, stop) row ranges per app ID.
+        arrays (dict): The memory-mapped arrays per column.
+
+    Methods:
+        __init__: Opens the snapshot in the given directory.
+        build: Rewrites the snapshot from all rows of the review table.
+        refresh: Appends the rows of the review table changed since the last snapshot.
+        app_slices: Get zero-copy views of the rows of an app per range.
+        app_column: Get the live values of one column of an app.
+    """
+
+    COLUMNS: dict = {
+        "app_id": np.int64,
+        "author_steamid": np.int64,
+        "voted_up": np.int8,
+        "votes_up": np.int64,
+        "weighted_vote_score": np.float64,
+        "author_playtime_at_review": np.int64,
+        "author_playtime_forever": np.int64,
+        "author_playtime_last_two_weeks": np.int64,
+        "author_last_played": np.int64,
+        "timestamp_created": np.int64,
+        "timestamp_updated": np.int64,
+    }
+
+    def __init__(self, path: str = config.SNAPSHOT_PATH) -> None:
+        """
+        Opens the snapshot in the given directory.
+
+        Args:
+            path (str): The directory of the snapshot.
+        """
+        self.path: str = path
+        self.rows: int = 0
+        self.watermark: int = None
+        self.ranges: dict = {}
+        self.arrays: dict = {}
+        index_path = os.path.join(self.path, "index.json")
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            self.rows = index.get("rows")
+            self.watermark = index.get("watermark")
+            self.ranges = {int(app_id): ranges for app_id, ranges in index.get("ranges").items()}
+        if not isinstance(self.watermark, (int, type(None))):
+            # snapshots of the formatted string times are rebuilt on the next refresh
+            self.rows = 0
+            self.watermark = None
+            self.ranges = {}
+        self._map()
+
+    def _column_path(self, column: str) -> str:
+        """
+        Get the path of the file of a column.
+
+        Args:
+            column (str): The name of the column.
+
+        Returns:
+            str: The path of the column file.
+        """
+        return os.path.join(self.path, f"{column}.bin")
+
+    def _map(self, mode: str = "r") -> None:
+        """
+        Memory-maps the column files.
+
+        Args:
+            mode (str): The memory-map mode, "r" for reading and "r+" for updating.
+
+        Returns:
+            None
+        """
+        self.arrays = {}
+        for column, dtype in list(self.COLUMNS.items()) + [("live", np.int8)]:
+            if self.rows == 0:
+                self.arrays[column] = np.zeros(0, dtype=dtype)
+            else:
+                self.arrays[column] = np.memmap(self._column_path(column), dtype=dtype,
+                                                mode=mode, shape=(self.rows,))
+
+    def _save_index(self) -> None:
+        """
+        Writes the row count, watermark and app ranges of the snapshot.
+
+        Returns:
+            None
+        """
+        index = {"rows": self.rows,
+                 "watermark": self.watermark,
+                 "columns": {column: np.dtype(dtype).name for column, dtype in self.COLUMNS.items()},
+                 "ranges": self.ranges}
+        index_path = os.path.join(self.path, "index.json")
+        with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(index_path + ".tmp", index_path)
+
+    def build(self, db: database.Database) -> int:
+        """
+        Rewrites the snapshot from all rows of the review table. Rows fetched in the last
+        SNAPSHOT_SETTLE_SECONDS are included and appended once more by the next refresh.
+
+        Args:
+            db (Database): The database to read the reviews from.
+
+        Returns:
+            int: The number of rows in the snapshot.
+        """
+        self.rows = 0
+        self.watermark = None
+        self.ranges = {}
+        return self.refresh(db)
+
+    def refresh(self, db: database.Database) -> int:
+        """
+        Appends the rows of the review table changed since the last snapshot as a new
+        segment and marks the rows they supersede as not live. Rows fetched in the last
+        SNAPSHOT_SETTLE_SECONDS are left to the next refresh, since the crawl may still
+        be writing reviews with that last_time_fetched.
+
+        Args:
+            db (Database): The database to read the reviews from.
+
+        Returns:
+            int: The number of appended rows.
+        """
+        self.arrays = {}
+        os.makedirs(self.path, exist_ok=True)
+        # drop rows a failed refresh appended after the last saved index
+        for column, column_type in list(self.COLUMNS.items()) + [("live", np.int8)]:
+            with open(self._column_path(column), "ab") as f:
+                f.truncate(self.rows * np.dtype(column_type).itemsize)
+        dtype = np.dtype(list(self.COLUMNS.items()))
+        start = self.rows
+        until = int(time.time()) - max(0, config.SNAPSHOT_SETTLE_SECONDS)
+        if self.watermark is not None and until <= self.watermark + 1:
+            until = self.watermark + 1
+        for batch in db.get_review_numbers(self.watermark, until, config.SNAPSHOT_BATCH_SIZE):
+            segment = np.array(batch, dtype=dtype)
+            for column in self.COLUMNS:
+                with open(self._column_path(column), "ab") as f:
+                    f.write(np.ascontiguousarray(segment[column]).tobytes())
+            with open(self._column_path("live"), "ab") as f:
+                f.write(np.ones(len(segment), dtype=np.int8).tobytes())
+            self.rows += len(segment)
+        appended = self.rows - start
+
+        self._map("r+")
+        if appended > 0:
+            app_ids = self.arrays["app_id"][start:]
+            # the new segment is sorted by app ID, so every app is one contiguous range
+            boundaries = np.flatnonzero(np.diff(app_ids)) + 1
+            starts = np.concatenate(([0], boundaries))
+            stops = np.concatenate((boundaries, [appended]))
+            for range_start, range_stop in zip(starts.tolist(), stops.tolist()):
+                app_id = int(app_ids[range_start])
+                new_ids = self.arrays["author_steamid"][start + range_start:start + range_stop]
+                for old_start, old_stop in self.ranges.get(app_id, []):
+                    old_ids = self.arrays["author_steamid"][old_start:old_stop]
+                    self.arrays["live"][old_start:old_stop][np.isin(old_ids, new_ids)] = 0
+                self.ranges.setdefault(app_id, []).append(
+                    [start + range_start, start + range_stop])
+            self.arrays["live"].flush()
+        self.watermark = until - 1
+        self._save_index()
+        self._map()
+        return appended
+
+    def app_slices(self, app_id: int) -> list:
+        """
+        Get zero-copy views of the rows of an app, one per range. A snapshot that was
+        just built holds every app in a single range.
+
+        Args:
+            app_id (int): The ID of the app.
+
+        Returns:
+            list: A list of dictionaries with a view per column, including live.
+        """
+        return [{column: array[start:stop] for column, array in self.arrays.items()}
+                for start, stop in self.ranges.get(app_id, [])]
+
+    def app_column(self, app_id: int, column: str) -> np.ndarray:
+        """
+        Get the live values of one column of an app. The values are a zero-copy view if
+        the app is a single range without superseded rows, a copy otherwise.
+
+        Args:
+            app_id (int): The ID of the app.
+            column (str): The name of the column.
+
+        Returns:
+            np.ndarray: The live values of the column.
+        """
+        slices = self.app_slices(app_id)
+        if len(slices) == 1 and slices[0]["live"].all():
+            return slices[0][column]
+        if len(slices) == 0:
+            return np.zeros(0, dtype=self.COLUMNS[column])
+        return np.concatenate([part[column][part["live"] == 1] for part in slices])
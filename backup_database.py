@@ -0,0 +1,26 @@
+""" This script takes an online backup of the database and its review shards into the
+BACKUP_PATH directory. It can run while a crawl is writing to the database.
+
+Usage: python backup_database.py
+"""
+
+import sys
+import config
+from app import database
+from app import maintenance
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and (sys.argv[1] == "-h" or sys.argv[1] == "--help"):
+        print("This script takes an online backup of the database and its review shards.")
+        print()
+        print("Usage: python backup_database.py")
+        print("The backup is written to BACKUP_PATH in the config.py file.")
+        sys.exit(0)
+    db = database.Database()
+    if maintenance.Maintenance(db).backup():
+        print(f"Backed up the database to {config.BACKUP_PATH}.")
+        db.close()
+        sys.exit(0)
+    db.close()
+    sys.exit(1)
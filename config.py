@@ -25,3 +25,38 @@ REVIEW_TYPE = "all"  # all, positive, negative
 PURCHASE_TYPE = ""  # all, non_steam_purchase, steam
 NUM_PER_PAGE = "100"  # max 100, default 20
 FILTER_OFFTOPIC_ACTIVITY = ""  # 0, 1
+
+# Deduplication while crawling an app
+DEDUP_CURSOR_WINDOW = 64  # number of recent cursors kept to detect cursor cycles
+DEDUP_BLOOM_CAPACITY = 2000000  # expected number of recommendation ids per app
+DEDUP_BLOOM_FALSE_POSITIVE_RATE = 0.001  # accepted false positive rate of the bloom filter
+
+# Crawl journal
+CRAWL_LOG_BATCH_SIZE = 50  # number of page rows buffered before they are written
+CRAWL_LOG_RETENTION_DAYS = 30  # page rows older than this are rolled up per app and day
+
+# Review shards, 0 keeps all reviews in the review table of DATABASE_PATH
+# SQLite attaches at most 10 databases by default
+REVIEW_SHARDS = 0  # number of review shard files, reviews are routed by a hash of app_id
+REVIEW_SHARD_PATH = "database/review_{}.db"  # path of a review shard file, {} is the shard number
+
+# Columnar snapshot of the numeric review fields
+SNAPSHOT_PATH = "database/snapshot"  # directory of the memory-mapped column files
+SNAPSHOT_BATCH_SIZE = 100000  # number of review rows read from the database per batch
+SNAPSHOT_SETTLE_SECONDS = 60  # reviews fetched this recently wait for the next refresh
+
+# Author cache
+AUTHOR_CACHE_SIZE = 500000  # number of authors kept in memory during a crawl
+
+# Maintenance during a crawl
+JOURNAL_MODE = "WAL"  # WAL lets backups read while the crawl writes
+MAINTENANCE_CHECKPOINT_INTERVAL = 60  # seconds between passive WAL checkpoints
+MAINTENANCE_VACUUM_INTERVAL = 600  # seconds between incremental vacuums
+MAINTENANCE_VACUUM_PAGES = 1000  # number of free pages returned per incremental vacuum
+MAINTENANCE_OPTIMIZE_INTERVAL = 3600  # seconds between PRAGMA optimize runs
+BACKUP_INTERVAL = 0  # seconds between online backups during a crawl, 0 disables them
+BACKUP_PATH = "database/backup"  # directory of the backup files
+BACKUP_PAGES_PER_STEP = 256  # number of pages copied per backup step
+BACKUP_STEP_SLEEP = 0.05  # seconds to sleep between backup steps
+BACKUP_MAX_WRITER_DEPTH = 0  # pause the backup while the crawl has more writes pending
+BACKUP_MAX_WAIT = 5  # maximum seconds a backup step waits for the crawl
@@ -0,0 +1,86 @@
+""" This script prints a throughput report from the crawl journal in the database.
+
+The report shows the pages per second over time and the apps with the highest
+average page latency. The pages per second are averaged over the whole bucket,
+rolled up days are shown per day if the buckets are shorter than a day. With --rollup the journal rows older than the retention
+period are first aggregated into daily rows per app and deleted.
+
+Usage: python crawl_report.py [--rollup] [<bucket_seconds>] [<limit>]
+bucket_seconds: The length of a time bucket in seconds, at least 1, default is 3600.
+limit: The number of slowest apps to show, default is 10.
+
+Example usage:
+- python crawl_report.py
+- python crawl_report.py 600 20
+- python crawl_report.py --rollup
+"""
+
+import sys
+from datetime import datetime, timezone
+from app import crawllog
+from app import database
+
+
+def report(bucket_seconds: int = 3600, limit: int = 10, rollup: bool = False) -> None:
+    """
+    Prints the throughput over time and the slowest apps of the crawl journal.
+
+    Args:
+        bucket_seconds (int): The length of a time bucket in seconds.
+        limit (int): The number of slowest apps to show.
+        rollup (bool): Roll up the journal rows past their retention first.
+
+    Returns:
+        None
+    """
+    db = database.Database()
+
+    if rollup:
+        rolled_up = crawllog.CrawlLog(db).rollup()
+        print(f"Rolled up {rolled_up} crawl pages.")
+        print()
+
+    print(f"{'bucket (UTC)':<20} {'seconds':>8} {'pages':>8} {'reviews':>10} {'pages/sec':>10}")
+    for bucket, seconds, pages, reviews, pages_per_second in db.get_crawl_throughput(
+            bucket_seconds):
+        start = datetime.fromtimestamp(bucket, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"{start:<20} {seconds:>8} {pages:>8} {reviews or 0:>10} "
+              f"{pages_per_second:>10.3f}")
+    print()
+
+    print(f"{'app_id':<10} {'pages':>8} {'avg ms':>10} {'max ms':>10} {'errors':>8}")
+    for app_id, pages, latency_avg, latency_max, errors in db.get_slowest_apps(limit):
+        print(f"{app_id:<10} {pages:>8} {latency_avg or 0:>10.1f} "
+              f"{latency_max or 0:>10.1f} {errors or 0:>8}")
+
+    db.close()
+
+def display_help() -> None:
+    """
+    Displays the help message for the script.
+
+    Returns:
+        None
+    """
+    print("This script prints a throughput report from the crawl journal in the database.")
+    print()
+    print("Usage: python crawl_report.py [--rollup] [<bucket_seconds>] [<limit>]")
+    print("--rollup: Roll up the crawl pages older than the retention period first.")
+    print("bucket_seconds: The length of a time bucket in seconds, at least 1, default is 3600.")
+    print("limit: The number of slowest apps to show, default is 10.")
+    print("The pages per second are averaged over the whole bucket, rolled up days are")
+    print("shown per day if the buckets are shorter than a day.")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if len(args) > 0 and (args[0] == "-h" or args[0] == "--help"):
+        display_help()
+        sys.exit(0)
+    do_rollup = "--rollup" in args
+    args = [arg for arg in args if arg != "--rollup"]
+    if len(args) > 2 or not all(arg.isdigit() for arg in args) or (args and int(args[0]) < 1):
+        print("Usage: python crawl_report.py [--rollup] [<bucket_seconds>] [<limit>]")
+        sys.exit(1)
+    report(*[int(arg) for arg in args], rollup=do_rollup)
+    sys.exit(0)
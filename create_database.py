@@ -1,12 +1,34 @@
 """ This script creates the database and the tables in the database.
+
+Tables of an existing database are kept, columns added to the schema since
+the database was created are appended to them.
 """
 
+import sqlite3
 from app import database
 import config
 
 with open(config.SCHEMA_PATH, "r", encoding="utf-8") as f:
-    db = database.Database()
-    cursor = db.get_cursor()
-    cursor.executescript(f.read())
-    db.commit()
-    db.close()
+    schema = f.read()
+
+# the schema as a fresh database, to compare the columns of existing tables against
+reference = sqlite3.connect(":memory:")
+reference.executescript(schema)
+
+db = database.Database()
+cursor = db.get_cursor()
+cursor.executescript(schema)
+tables = reference.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+for (table,) in tables:
+    existing = {row[1] for row in cursor.execute(f'PRAGMA main.table_info("{table}")')}
+    for _, column, column_type, _, default, _ in reference.execute(
+            f'PRAGMA table_info("{table}")'):
+        if column not in existing:
+            definition = f'"{column}" {column_type}'
+            if default is not None:
+                definition += f" DEFAULT {default}"
+            cursor.execute(f'ALTER TABLE main."{table}" ADD COLUMN {definition}')
+            print(f"Added column {column} to table {table}.")
+db.commit()
+db.close()
+reference.close()
@@ -1,5 +1,7 @@
 /*
 * This file contains the DDL for the database.
+* Times are stored as unix epoch integers and booleans as 0/1 integers.
+* Run migrate_database.py to convert a database created with an older schema.
 */
 
 -- DROP TABLE IF EXISTS "author";
@@ -11,11 +13,11 @@
 * This table contains the user information.
 * The steam_id is the primary key.
 */
-CREATE TABLE "author"(
+CREATE TABLE IF NOT EXISTS "author"(
     "steamid" integer NOT NULL,
     "num_games_owned" integer,
     "num_reviews" integer,
-    "last_time_fetched" varchar(255),
+    "last_time_fetched" integer,
     PRIMARY KEY("steamid")
 );
 
@@ -24,49 +26,102 @@ CREATE TABLE "author"(
 /*
 * This table contains the game information.
 * The id is the primary key.
+* The review totals are taken from the query_summary of the first page of a crawl.
 */
-CREATE TABLE "app" (
+CREATE TABLE IF NOT EXISTS "app" (
     "id" integer NOT NULL,
     "name" varchar(255) NOT NULL,
     "shop_url" varchar(255) DEFAULT NULL,
-    "last_time_fetched" varchar(255),
+    "last_time_fetched" integer,
+    "total_reviews" integer,
+    "total_positive" integer,
+    "total_negative" integer,
+    "review_score" integer,
     PRIMARY KEY("id")
 );
 
--- INSERT INTO app VALUES(?, ?, ?, ?);
+-- INSERT INTO app (id, name, shop_url, last_time_fetched) VALUES(?, ?, ?, ?);
 
 /*
 * This table is a many-to-many relationship between the author and game tables.
 * The review table has a composite primary key of author_steamid and game_id.
+* It keeps its rowid, the review text makes rows too large for WITHOUT ROWID.
 */
-CREATE TABLE "review" (
-    "author_steamid" integer NOT NULL, 
+CREATE TABLE IF NOT EXISTS "review" (
+    "author_steamid" integer NOT NULL,
     "app_id" integer NOT NULL,
     "comment_count" integer,
-    "hidden_in_steam_china" boolean,
+    "hidden_in_steam_china" integer,
     "language" varchar(255),
-    "received_for_free" boolean,
+    "received_for_free" integer,
     "recommendationid" integer,
     "review" text,
     "steam_china_location" varchar(255),
-    "steam_purchase" boolean,
+    "steam_purchase" integer,
     "timestamp_created" integer,
     "timestamp_updated" integer,
-    "voted_up" boolean,
+    "voted_up" integer,
     "votes_funny" integer,
     "votes_up" integer,
     "weighted_vote_score" real,
-    "written_during_early_access" boolean,
+    "written_during_early_access" integer,
     "author_playtime_at_review" integer,
     "author_playtime_forever" integer,
     "author_playtime_last_two_weeks" integer,
     "author_last_played" integer,
     "developer_response" text,
-    "timestamp_dev_responded" text,
-    "last_time_fetched" varchar(255),
+    "timestamp_dev_responded" integer,
+    "last_time_fetched" integer,
     PRIMARY KEY("author_steamid", "app_id"),
     FOREIGN KEY("author_steamid") REFERENCES "author"("steamid"),
     FOREIGN KEY("app_id") REFERENCES "app"("id")
 );
 
--- INSERT INTO review VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?);
\ No newline at end of file
+-- qualified, so that it is not resolved to the temporary review view over the shards
+CREATE INDEX IF NOT EXISTS "main"."review_last_time_fetched" ON "review"("last_time_fetched");
+
+-- INSERT INTO review VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?);
+
+
+/*
+* This table is the crawl journal with one row per requested page.
+* fetched_at is the unix epoch of the request, latency_ms the request duration.
+*/
+CREATE TABLE IF NOT EXISTS "crawl_page" (
+    "id" integer NOT NULL,
+    "app_id" integer NOT NULL,
+    "cursor" varchar(255),
+    "params" text,
+    "http_status" integer,
+    "latency_ms" real,
+    "bytes" integer,
+    "reviews_returned" integer,
+    "inserted" integer,
+    "updated" integer,
+    "fetched_at" integer NOT NULL,
+    PRIMARY KEY("id")
+);
+
+CREATE INDEX IF NOT EXISTS "crawl_page_fetched_at" ON "crawl_page"("fetched_at");
+
+-- INSERT INTO crawl_page VALUES(NULL,?,?,?,?,?,?,?,?,?,?);
+
+/*
+* This table contains the daily rollup of crawl_page rows past their retention.
+* The table has a composite primary key of app_id and day (unix epoch of midnight UTC).
+*/
+CREATE TABLE IF NOT EXISTS "crawl_rollup" (
+    "app_id" integer NOT NULL,
+    "day" integer NOT NULL,
+    "pages" integer,
+    "errors" integer,
+    "latency_ms_total" real,
+    "latency_ms_max" real,
+    "bytes" integer,
+    "reviews_returned" integer,
+    "inserted" integer,
+    "updated" integer,
+    "first_fetched_at" integer,
+    "last_fetched_at" integer,
+    PRIMARY KEY("app_id", "day")
+) WITHOUT ROWID;
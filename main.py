@@ -8,7 +8,12 @@ from datetime import datetime
 import time
 import requests
 import config
+from app import authorcache
+from app import crawllog
+from app import crawlplan
 from app import database
+from app import dedup
+from app import maintenance
 from app import urlbuilder
 
 class Main:
@@ -19,6 +24,11 @@ class Main:
         url (str): The URL used for sending requests.
         url_builder (URLBuilder): An instance of the URLBuilder class for building URLs.
         database (Database): An instance of the Database class for interacting with the database.
+        deduplicator (CrawlDeduplicator): Detects cursor cycles and duplicate pages of an app.
+        crawl_log (CrawlLog): The journal with one row per requested page.
+        last_request (dict): The HTTP status, latency and size of the last request.
+        author_cache (AuthorCache): Skips author writes that would not change the author.
+        maintenance (Maintenance): Backs up and maintains the database between commits.
     """
 
     def __init__(self) -> None:
@@ -28,11 +38,17 @@ class Main:
         self.url:str = ""
         self.url_builder:urlbuilder.URLBuilder = urlbuilder.URLBuilder()
         self.database:database.Database = database.Database()
+        self.deduplicator:dedup.CrawlDeduplicator = dedup.CrawlDeduplicator()
+        self.crawl_log:crawllog.CrawlLog = crawllog.CrawlLog(self.database)
+        self.last_request:dict = {}
+        self.author_cache:authorcache.AuthorCache = authorcache.AuthorCache(self.database)
+        self.maintenance:maintenance.Maintenance = maintenance.Maintenance(self.database)
 
 
     def request_reviews(self, url:str) -> dict:
         """
         Sends a GET request to the specified URL and returns the response as a JSON dictionary.
+        The HTTP status, latency and size of the response are kept in last_request.
 
         Args:
             url (str): The URL to send the request to.
@@ -41,7 +57,18 @@ class Main:
             dict: The response from the request as a JSON dictionary. If the request fails or
                     the response status code is not 200, an empty dictionary is returned.
         """
-        response = requests.get(url, timeout=5)
+        start = time.perf_counter()
+        try:
+            response = requests.get(url, timeout=5)
+        except requests.RequestException as e:
+            print(f"Error {e}: for {url}")
+            self.last_request = {"http_status": None,
+                                 "latency_ms": (time.perf_counter() - start) * 1000,
+                                 "bytes": 0}
+            return {}
+        self.last_request = {"http_status": response.status_code,
+                             "latency_ms": (time.perf_counter() - start) * 1000,
+                             "bytes": len(response.content)}
         if response.status_code == 200:
             return response.json()
         return {}
@@ -66,12 +93,17 @@ class Main:
             sys.exit(1)
 
         print(app_ids)
+        self.maintenance.start()
+        totals: dict = self.database.get_app_review_totals()
+        plan = crawlplan.CrawlPlan({app_id: totals.get(app_id) for app_id in app_ids},
+                                   self.url_builder.num_per_page)
         for app_id in app_ids:
             cursor: str = config.CURSOR
-            cursors: set = set()
-            number_of_cursors: int = 0
+            self.deduplicator.reset()
+            plan.start_app(app_id)
             has_cursor: bool = True
             while has_cursor:
+                page_start = time.perf_counter()
                 # build the URL
                 self.url_builder.set_cursor(cursor)
                 self.url_builder.set_appid(app_id)
@@ -83,7 +115,8 @@ class Main:
 
                 # request the reviews
                 response: dict = self.request_reviews(self.url)
-                last_time_fetched: str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                last_time_fetched: int = int(time.time())
+                self.maintenance.writer_depth = len(response.get("reviews", [])) + 1
 
                 if self.database.is_app_exists(app_id):
                     self.database.update_app_last_time_fetched(app_id, last_time_fetched)
@@ -92,16 +125,25 @@ class Main:
                 if response == {}:
                     has_cursor = False
 
-                for review in response.get("reviews"):
+                query_summary: dict = response.get("query_summary", {})
+                if cursor == config.CURSOR and "total_reviews" in query_summary:
+                    self.database.update_app_review_totals(app_id, query_summary)
+                    plan.set_total(query_summary.get("total_reviews"))
+
+                reviews: list = response.get("reviews", [])
+                page_seen, new_reviews = self.deduplicator.is_page_seen(reviews)
+                if page_seen:
+                    print(f"app_id: {app_id} cursor: {cursor} returned a duplicate page")
+                    reviews = []
+                    has_cursor = False
+
+                inserted: int = 0
+                updated: int = 0
+                for review in reviews:
 
                     author = review.get("author")
                     author.update({"last_time_fetched": last_time_fetched})
-                    if self.database.is_author_exists(author.get("steamid")):
-                        self.database.update_author(author)
-                        # print("Updated author")
-                    else:
-                        self.database.insert_author(author)
-                        # print("Inserted author")
+                    self.author_cache.write(author)
 
                     review_data: dict = review
 
@@ -123,21 +165,32 @@ class Main:
                                     review_data.get("app_id")
                                     ):
                         self.database.update_review(review_data)
+                        updated += 1
                         # print("Updated review")
                     else:
                         self.database.insert_review(review_data)
+                        inserted += 1
                         # print("Inserted review")
+
+                page: dict = dict(self.last_request)
+                page.update({"app_id": app_id,
+                             "cursor": cursor,
+                             "params": urllib.parse.urlsplit(self.url).query,
+                             "reviews_returned": len(response.get("reviews", [])),
+                             "inserted": inserted,
+                             "updated": updated,
+                             "fetched_at": int(time.time())})
+                self.crawl_log.log_page(page)
                 self.database.commit()
+                self.maintenance.writer_depth = 0
+                self.maintenance.run_due()
 
                 # * update cursor
                 cursor = response.get("cursor")
                 # print(cursor)
                 if cursor is not None:
                     cursor = urllib.parse.quote(cursor)
-                    cursors.add(cursor)
-                    if number_of_cursors != len(cursors):
-                        number_of_cursors = len(cursors)
-                    else:
+                    if self.deduplicator.is_cursor_seen(cursor):
                         has_cursor = False
                 else:
                     has_cursor = False
@@ -145,7 +198,18 @@ class Main:
                 # * sleep for 1 second to avoid rate limiting
                 time.sleep(1)
 
+                # * reviews repeated under another cursor do not count towards the total
+                plan.add_page(new_reviews, time.perf_counter() - page_start)
+                print(plan.progress())
+                if has_cursor and plan.is_app_complete():
+                    # * the page chain holds all reviews Steam reported for the app
+                    has_cursor = False
+
+        self.crawl_log.flush()
+        self.database.commit()
+        self.maintenance.stop()
         self.database.close()
+        print(self.author_cache.stats())
 
 
     def display_help(self, command: str = "") -> None:
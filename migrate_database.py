@@ -0,0 +1,214 @@
+""" This script migrates an existing database in place to the typed schema in schema.sql.
+
+Every table whose columns or WITHOUT ROWID layout differ from the schema is copied
+into a new table in batches, converting the values on the way:
+- formatted "%Y-%m-%d %H:%M:%S" local times become unix epoch integers
+- booleans become 0/1 integers
+- timestamp_dev_responded becomes an integer
+
+Every batch is committed on its own, so an interrupted migration resumes where it
+stopped when the script is run again. The review shards are migrated as well.
+
+Usage: python migrate_database.py [<batch_size>]
+batch_size: The number of rows copied per batch, default is 10000.
+
+Example usage:
+- python migrate_database.py
+- python migrate_database.py 50000
+"""
+
+import re
+import sqlite3
+import sys
+import config
+from app import database
+
+TIME_COLUMNS = ("last_time_fetched",)
+BOOLEAN_COLUMNS = ("hidden_in_steam_china", "received_for_free", "steam_purchase",
+                   "voted_up", "written_during_early_access")
+INTEGER_COLUMNS = ("timestamp_dev_responded",)
+
+
+def convert(column: str) -> str:
+    """
+    Get the SQL expression converting a column of the old schema to the typed schema.
+
+    Args:
+        column (str): The name of the column.
+
+    Returns:
+        str: The SQL expression.
+    """
+    if column in TIME_COLUMNS:
+        # the formatted times were written with datetime.now(), i.e. in local time
+        return f"""CASE WHEN typeof("{column}") = 'text'
+                   THEN CAST(strftime('%s', "{column}", 'utc') AS INTEGER)
+                   ELSE "{column}" END"""
+    if column in BOOLEAN_COLUMNS:
+        return f"""CASE WHEN "{column}" IS NULL THEN NULL
+                   WHEN "{column}" IN (1, '1', 'true', 'True') THEN 1 ELSE 0 END"""
+    if column in INTEGER_COLUMNS:
+        return f"""CASE WHEN "{column}" = '' THEN NULL ELSE CAST("{column}" AS INTEGER) END"""
+    return f'"{column}"'
+
+
+def get_table_layout(connection: sqlite3.Connection, schema: str, table: str) -> tuple:
+    """
+    Get the columns with their declared types and the WITHOUT ROWID layout of a table.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the database.
+        schema (str): The schema of the table, e.g. main or shard_0.
+        table (str): The name of the table.
+
+    Returns:
+        tuple: A list of (column, type) tuples and True if the table is WITHOUT ROWID.
+    """
+    columns = [(row[1], row[2].lower()) for row in
+               connection.execute(f'PRAGMA "{schema}".table_info("{table}")')]
+    sql = connection.execute(f'SELECT sql FROM "{schema}".sqlite_master WHERE name = ?',
+                             (table,)).fetchone()
+    without_rowid = sql is not None and "WITHOUT ROWID" in sql[0].upper()
+    return columns, without_rowid
+
+
+def migrate_table(db: database.Database, schema: str, table: str, ddl: str,
+                  batch_size: int) -> int:
+    """
+    Copies a table into a new table of the typed schema in batches and replaces it.
+
+    Args:
+        db (Database): The database to migrate.
+        schema (str): The schema of the table, e.g. main or shard_0.
+        table (str): The name of the table.
+        ddl (str): The CREATE TABLE statement of the typed table.
+        batch_size (int): The number of rows copied per batch.
+
+    Returns:
+        int: The number of copied rows.
+    """
+    connection = db.connection
+    new_table = f"{table}_migration"
+    connection.execute(ddl.replace(f'"{table}"', f'"{schema}"."{new_table}"', 1))
+    connection.commit()
+
+    columns = [column for column, _ in get_table_layout(connection, schema, table)[0]]
+    new_columns = [column for column, _ in get_table_layout(connection, schema, new_table)[0]]
+    _, without_rowid = get_table_layout(connection, schema, new_table)
+    shared = [column for column in new_columns if column in columns]
+    names = ", ".join(f'"{column}"' for column in shared)
+    values = ", ".join(convert(column) for column in shared)
+
+    if without_rowid:
+        # rows of WITHOUT ROWID tables are identified by their key, so a resumed
+        # migration starts over and skips the rows already copied
+        insert = f'INSERT OR IGNORE INTO "{schema}"."{new_table}" ({names})'
+        last_rowid = -1
+    else:
+        insert = f'INSERT INTO "{schema}"."{new_table}" (rowid, {names})'
+        values = "rowid, " + values
+        last_rowid = connection.execute(
+            f'SELECT COALESCE(MAX(rowid), -1) FROM "{schema}"."{new_table}"').fetchone()[0]
+
+    copied = 0
+    while True:
+        rowids = connection.execute(f"""
+                SELECT rowid FROM "{schema}"."{table}"
+                WHERE rowid > ? ORDER BY rowid LIMIT ?
+                """, (last_rowid, batch_size)).fetchall()
+        if not rowids:
+            break
+        connection.execute(f"""
+                {insert}
+                SELECT {values} FROM "{schema}"."{table}"
+                WHERE rowid > ? AND rowid <= ?
+                """, (last_rowid, rowids[-1][0]))
+        connection.commit()
+        last_rowid = rowids[-1][0]
+        copied += len(rowids)
+        print(f"{schema}.{table}: copied {copied} rows")
+
+    connection.execute("BEGIN")
+    connection.execute(f'DROP TABLE "{schema}"."{table}"')
+    connection.execute(f'ALTER TABLE "{schema}"."{new_table}" RENAME TO "{table}"')
+    connection.commit()
+    return copied
+
+
+def migrate(batch_size: int = 10000) -> None:
+    """
+    Migrates the database and its review shards in place to the typed schema.
+
+    Args:
+        batch_size (int): The number of rows copied per batch.
+
+    Returns:
+        None
+    """
+    with open(config.SCHEMA_PATH, "r", encoding="utf-8") as f:
+        schema_sql = f.read()
+
+    # the schema as a fresh database, to compare the existing tables against
+    reference = sqlite3.connect(":memory:")
+    reference.executescript(schema_sql)
+
+    db = database.Database()
+    # the union view over the shards must not be parsed while their tables are replaced
+    db.connection.execute("DROP VIEW IF EXISTS temp.review")
+    db.connection.commit()
+    targets = [("main", table) for (table,) in
+               reference.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    targets += [(f"shard_{shard}", "review") for shard in range(db.shards)]
+
+    for schema, table in targets:
+        ddl = re.search(rf'CREATE TABLE IF NOT EXISTS "{table}".*?\)( WITHOUT ROWID)?;',
+                        schema_sql, re.DOTALL).group(0)
+        if schema != "main":
+            # foreign keys cannot reference tables in another database file
+            ddl = re.sub(r',\s*FOREIGN KEY[^\n]*', "", ddl)
+        existing = get_table_layout(db.connection, schema, table)
+        if not existing[0]:
+            continue
+        # columns missing from an older table are added by create_database.py, not here
+        expected = get_table_layout(reference, "main", table)
+        if existing[1] == expected[1] and all(
+                dict(expected[0]).get(column) == column_type for column, column_type in existing[0]):
+            print(f"{schema}.{table}: up to date")
+            continue
+        copied = migrate_table(db, schema, table, ddl, batch_size)
+        print(f"{schema}.{table}: migrated {copied} rows")
+
+    # recreate the indexes dropped with the old tables
+    db.cursor.executescript(schema_sql)
+    db.commit()
+    db.close()
+    db = database.Database()
+    db.connection.execute("VACUUM")
+    db.close()
+    reference.close()
+
+
+def display_help() -> None:
+    """
+    Displays the help message for the script.
+
+    Returns:
+        None
+    """
+    print("This script migrates an existing database in place to the typed schema.")
+    print()
+    print("Usage: python migrate_database.py [<batch_size>]")
+    print("batch_size: The number of rows copied per batch, default is 10000.")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and (sys.argv[1] == "-h" or sys.argv[1] == "--help"):
+        display_help()
+    elif len(sys.argv) == 1:
+        migrate()
+    elif len(sys.argv) == 2 and sys.argv[1].isdigit():
+        migrate(int(sys.argv[1]))
+    else:
+        print("Usage: python migrate_database.py [<batch_size>]")
+        sys.exit(1)
+    sys.exit(0)
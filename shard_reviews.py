@@ -0,0 +1,44 @@
+""" This script moves the reviews of the review table in the main database into
+the review shards configured by REVIEW_SHARDS in the config.py file.
+
+The number of shards the reviews are routed to is stored in the main database. If
+REVIEW_SHARDS was changed since, the reviews are first moved back from the shards
+they are in and then routed to the new number of shards. With REVIEW_SHARDS set
+to 0 the reviews are moved back into the main database.
+
+Usage: python shard_reviews.py
+"""
+
+import sqlite3
+import sys
+import config
+from app import database
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and (sys.argv[1] == "-h" or sys.argv[1] == "--help"):
+        print("This script moves the reviews of the main database into the review shards.")
+        print()
+        print("Usage: python shard_reviews.py")
+        print("The number of shards is set by REVIEW_SHARDS in the config.py file.")
+        print("If it was changed, the reviews are rebalanced to the new number of shards.")
+        sys.exit(0)
+    connection = sqlite3.connect(config.DATABASE_PATH)
+    stored = connection.execute("PRAGMA main.user_version").fetchone()[0]
+    connection.close()
+    if stored not in (0, config.REVIEW_SHARDS):
+        db = database.Database(shards=stored)
+        print(f"Moved {db.move_reviews_from_shards()} reviews back from {stored} shards.")
+        rebalanced = db.get_stored_shards() == 0
+        db.close()
+        if not rebalanced:
+            sys.exit(1)
+    if config.REVIEW_SHARDS == 0:
+        if stored == 0:
+            print("REVIEW_SHARDS is 0 in the config.py file, there are no shards to move reviews to.")
+            sys.exit(1)
+        sys.exit(0)
+    db = database.Database()
+    print(f"Moved {db.move_reviews_to_shards()} reviews to {db.shards} shards.")
+    db.close()
+    sys.exit(0)
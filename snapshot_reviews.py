@@ -0,0 +1,44 @@
+""" This script writes the numeric fields of the review table to the columnar snapshot
+in SNAPSHOT_PATH, one memory-mapped NumPy file per column.
+
+Without arguments only the reviews fetched since the last snapshot are appended.
+With --rebuild the snapshot is rewritten from all reviews, which puts the rows of
+every app in a single range again.
+
+Usage: python snapshot_reviews.py [--rebuild]
+"""
+
+import sys
+from app import database
+from app import snapshot
+
+
+def display_help() -> None:
+    """
+    Displays the help message for the script.
+
+    Returns:
+        None
+    """
+    print("This script writes the numeric review fields to the columnar snapshot.")
+    print()
+    print("Usage: python snapshot_reviews.py [--rebuild]")
+    print("--rebuild: Rewrite the snapshot from all reviews instead of appending changed ones.")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and (sys.argv[1] == "-h" or sys.argv[1] == "--help"):
+        display_help()
+        sys.exit(0)
+    if len(sys.argv) > 2 or (len(sys.argv) == 2 and sys.argv[1] != "--rebuild"):
+        print("Usage: python snapshot_reviews.py [--rebuild]")
+        sys.exit(1)
+    db = database.Database()
+    review_snapshot = snapshot.ReviewSnapshot()
+    if len(sys.argv) == 2:
+        rows = review_snapshot.build(db)
+    else:
+        rows = review_snapshot.refresh(db)
+    print(f"Wrote {rows} reviews, the snapshot has {review_snapshot.rows} rows.")
+    db.close()
+    sys.exit(0)